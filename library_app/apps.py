@@ -4,3 +4,7 @@ from django.apps import AppConfig
 class LibraryAppConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'library_app'
+
+    def ready(self):
+        # Đăng ký signal xoá cache User khi User thay đổi
+        from . import backends  # noqa: F401
@@ -0,0 +1,73 @@
+import uuid
+
+from django.conf import settings
+from django.contrib.auth.backends import ModelBackend
+from django.contrib.auth.models import User
+from django.core.cache import caches
+from django.db import DEFAULT_DB_ALIAS, transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+USER_CACHE_ALIAS = "users"
+USER_CACHE_KEY = "auth_user:%s:%s"
+USER_VERSION_KEY = "auth_user_version:%s"
+
+
+def _user_cache():
+    return caches[USER_CACHE_ALIAS]
+
+
+def _version_cache():
+    """Cache dùng chung giữa các worker để lưu phiên bản của từng User, None nếu không có"""
+    alias = getattr(settings, "USER_CACHE_VERSION_ALIAS", None)
+    return caches[alias] if alias else None
+
+
+class CachedModelBackend(ModelBackend):
+    """
+    ModelBackend có cache User theo từng process: request đã đăng nhập không phải
+    truy vấn bảng auth_user nữa. Khoá cache gồm phiên bản User trong cache dùng chung
+    (USER_CACHE_VERSION_ALIAS), phiên bản đổi mỗi khi User được lưu, nên đổi mật khẩu
+    hay thu hồi is_active/is_staff có hiệu lực ngay ở mọi worker. Không có cache dùng
+    chung thì không cache User.
+    """
+
+    def get_user(self, user_id):
+        versions = _version_cache()
+        if versions is None:
+            return super().get_user(user_id)
+
+        version = versions.get_or_set(USER_VERSION_KEY % user_id, lambda: uuid.uuid4().hex, None)
+        key = USER_CACHE_KEY % (user_id, version)
+        user = _user_cache().get(key)
+        if user is None:
+            user = self._get_user_from_primary(user_id)
+            if user is not None:
+                _user_cache().set(key, user, getattr(settings, "USER_CACHE_TIMEOUT", 60))
+        return user
+
+    def _get_user_from_primary(self, user_id):
+        # Không để router chọn replica: bản User trễ sẽ bị cache dưới phiên bản mới
+        try:
+            user = User._default_manager.db_manager(DEFAULT_DB_ALIAS).get(pk=user_id)
+        except User.DoesNotExist:
+            return None
+        return user if self.user_can_authenticate(user) else None
+
+
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+def invalidate_cached_user(sender, instance, **kwargs):
+    versions = _version_cache()
+    if versions is None:
+        return
+    key = USER_VERSION_KEY % instance.pk
+
+    def bump_version():
+        # Đổi phiên bản: bản cache cũ ở mọi worker không còn được dùng tới
+        versions.set(key, uuid.uuid4().hex, None)
+
+    bump_version()
+    # Đổi thêm lần nữa sau commit: worker nào đọc phải dữ liệu cũ trước khi commit
+    # cũng chỉ cache vào phiên bản đã bỏ
+    transaction.on_commit(bump_version)
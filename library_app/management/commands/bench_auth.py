@@ -0,0 +1,79 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.test import Client
+from django.test.utils import CaptureQueriesContext, override_settings, setup_test_environment, teardown_test_environment
+from django.urls import reverse
+
+PASSWORD = "Bench-pass-123"
+
+
+class Command(BaseCommand):
+    help = "Đo thông lượng đăng kí/đăng nhập trên database test tạm thời (không đụng tới dữ liệu thật)"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--users", type=int, default=50, help="Số tài khoản đăng kí rồi đăng nhập")
+        parser.add_argument(
+            "--hasher",
+            help="Hasher dùng khi đo, vd. django.contrib.auth.hashers.MD5PasswordHasher (mặc định theo settings)",
+        )
+
+    def handle(self, *args, **options):
+        setup_test_environment()
+        old_name = connection.creation.create_test_db(verbosity=0, autoclobber=True)
+        try:
+            overrides = {
+                "ALLOWED_HOSTS": ["testserver"],
+                # Trang HTML không cần file static đã collectstatic
+                "STORAGES": {
+                    "default": {"BACKEND": "library_app.storage.ContentAddressedStorage"},
+                    "staticfiles": {"BACKEND": "django.contrib.staticfiles.storage.StaticFilesStorage"},
+                },
+            }
+            if options["hasher"]:
+                overrides["PASSWORD_HASHERS"] = [options["hasher"]]
+            with override_settings(**overrides):
+                self._run(max(1, options["users"]))
+        finally:
+            connection.creation.destroy_test_db(old_name, verbosity=0)
+            teardown_test_environment()
+
+    def _run(self, users):
+        client = Client()
+        usernames = ["bench%d" % i for i in range(users)]
+
+        def register(username):
+            return client.post(reverse("library:register"), {
+                "last_name": "Bench",
+                "first_name": username,
+                "username": username,
+                "email": "%s@example.com" % username,
+                "password1": PASSWORD,
+                "password2": PASSWORD,
+            })
+
+        def login(username):
+            client.post(reverse("library:login"), {"username": username, "password": PASSWORD})
+            # Một request đã đăng nhập để đo phần đọc session + User
+            client.get(reverse("library:profile"))
+            client.logout()
+
+        self._report("register", usernames, register)
+        self._report("login", usernames, login)
+
+    def _report(self, label, usernames, action):
+        with CaptureQueriesContext(connection) as queries:
+            start = time.perf_counter()
+            for username in usernames:
+                action(username)
+            elapsed = time.perf_counter() - start
+        self.stdout.write(
+            "%-8s %6d lượt  %8.1f lượt/s  %6.2f ms/lượt  %5.1f truy vấn/lượt" % (
+                label,
+                len(usernames),
+                len(usernames) / elapsed,
+                elapsed * 1000 / len(usernames),
+                len(queries) / len(usernames),
+            )
+        )
@@ -0,0 +1,63 @@
+import posixpath
+import time
+
+from django.core.files.storage import default_storage
+from django.core.management.base import BaseCommand
+from django.db.models import Count
+
+from library_app.models import Book
+
+
+def image_reference_counts(names):
+    """Số Book đang dùng mỗi file ảnh bìa (file dùng chung nhờ ContentAddressedStorage)"""
+    rows = Book.objects.filter(image__in=names).values("image").annotate(total=Count("id"))
+    return {row["image"]: row["total"] for row in rows}
+
+
+class Command(BaseCommand):
+    help = "Xoá các ảnh bìa không còn Book nào tham chiếu, theo từng lô"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--directory", default="book_images", help="Thư mục trong MEDIA_ROOT cần dọn")
+        parser.add_argument("--batch-size", type=int, default=100, help="Số file xoá trong mỗi lô")
+        parser.add_argument(
+            "--min-age",
+            type=int,
+            default=3600,
+            help="Chỉ xoá file cũ hơn số giây này, tránh xoá ảnh vừa upload mà Book chưa kịp lưu",
+        )
+        parser.add_argument("--sleep", type=float, default=0.0, help="Nghỉ giữa các lô (giây)")
+        parser.add_argument("--dry-run", action="store_true", help="Chỉ liệt kê, không xoá")
+
+    def handle(self, *args, **options):
+        directory = options["directory"]
+        batch_size = max(1, options["batch_size"])
+        cutoff = time.time() - options["min_age"]
+
+        if not default_storage.exists(directory):
+            self.stdout.write(f"Không có thư mục {directory}")
+            return
+
+        _, filenames = default_storage.listdir(directory)
+        candidates = sorted(posixpath.join(directory, filename) for filename in filenames)
+
+        deleted = 0
+        for start in range(0, len(candidates), batch_size):
+            batch = candidates[start:start + batch_size]
+            # Đọc lại số tham chiếu cho từng lô để không xoá file vừa được gán cho Book khác
+            referenced = image_reference_counts(batch)
+            for name in batch:
+                if referenced.get(name):
+                    continue
+                if default_storage.get_modified_time(name).timestamp() > cutoff:
+                    continue
+                if options["dry_run"]:
+                    self.stdout.write(f"Sẽ xoá {name}")
+                else:
+                    default_storage.delete(name)
+                deleted += 1
+            if options["sleep"] and start + batch_size < len(candidates):
+                time.sleep(options["sleep"])
+
+        action = "Tìm thấy" if options["dry_run"] else "Đã xoá"
+        self.stdout.write(self.style.SUCCESS(f"{action} {deleted} file không còn được dùng"))
@@ -0,0 +1,31 @@
+import sqlite3
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DEFAULT_DB_ALIAS, connections
+
+from library_app.routers import REPLICA_DB_ALIAS
+
+
+class Command(BaseCommand):
+    help = "Chép database default sang file SQLite replica để thử định tuyến đọc/ghi khi chạy local"
+
+    def handle(self, *args, **options):
+        if REPLICA_DB_ALIAS not in connections.settings:
+            raise CommandError("Chưa khai báo database '%s' trong settings" % REPLICA_DB_ALIAS)
+
+        primary = connections[DEFAULT_DB_ALIAS].settings_dict
+        replica = connections[REPLICA_DB_ALIAS].settings_dict
+        sqlite_engine = "django.db.backends.sqlite3"
+        if primary["ENGINE"] != sqlite_engine or replica["ENGINE"] != sqlite_engine:
+            raise CommandError("Chỉ hỗ trợ SQLite; với MySQL hãy dùng replication của server")
+        if str(primary["NAME"]) == str(replica["NAME"]):
+            raise CommandError("Replica đang dùng chung file với default, đặt LIBRARY_REPLICA_DB trước")
+
+        source = sqlite3.connect(primary["NAME"])
+        target = sqlite3.connect(replica["NAME"])
+        try:
+            source.backup(target)
+        finally:
+            source.close()
+            target.close()
+        self.stdout.write(self.style.SUCCESS("Đã chép %s sang %s" % (primary["NAME"], replica["NAME"])))
@@ -0,0 +1,29 @@
+from django.db import migrations
+
+INDEX_NAME = 'library_auth_user_email_uniq'
+
+
+def create_email_index(apps, schema_editor):
+    # auth.User không có unique cho email; chỉ tạo được partial index (bỏ qua email rỗng)
+    # trên SQLite/PostgreSQL; MySQL xem 0005, các DB khác vẫn dựa vào kiểm tra trong register_view
+    if schema_editor.connection.vendor in ('sqlite', 'postgresql'):
+        schema_editor.execute(
+            "CREATE UNIQUE INDEX IF NOT EXISTS %s ON auth_user (email) WHERE email <> ''" % INDEX_NAME
+        )
+
+
+def drop_email_index(apps, schema_editor):
+    if schema_editor.connection.vendor in ('sqlite', 'postgresql'):
+        schema_editor.execute("DROP INDEX IF EXISTS %s" % INDEX_NAME)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('auth', '0012_alter_user_first_name_max_length'),
+        ('library_app', '0003_alter_book_image'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_email_index, drop_email_index),
+    ]
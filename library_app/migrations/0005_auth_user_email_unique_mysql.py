@@ -0,0 +1,36 @@
+from django.db import migrations
+
+INDEX_NAME = 'library_auth_user_email_uniq'
+
+
+def _supports_functional_index(connection):
+    # MySQL không có partial index; dùng functional index NULLIF(email, '') để email rỗng
+    # thành NULL và không bị coi là trùng. Cần MySQL 8.0.13+, MariaDB chưa hỗ trợ.
+    return (
+        connection.vendor == 'mysql'
+        and not connection.mysql_is_mariadb
+        and connection.mysql_version >= (8, 0, 13)
+    )
+
+
+def create_email_index(apps, schema_editor):
+    if _supports_functional_index(schema_editor.connection):
+        schema_editor.execute(
+            "CREATE UNIQUE INDEX %s ON auth_user ((NULLIF(email, '')))" % INDEX_NAME
+        )
+
+
+def drop_email_index(apps, schema_editor):
+    if _supports_functional_index(schema_editor.connection):
+        schema_editor.execute("DROP INDEX %s ON auth_user" % INDEX_NAME)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('library_app', '0004_auth_user_email_unique'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_email_index, drop_email_index),
+    ]
@@ -0,0 +1,63 @@
+import time
+from contextvars import ContextVar
+from functools import wraps
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS
+
+REPLICA_DB_ALIAS = "replica"
+PIN_SESSION_KEY = "_primary_pinned_until"
+PRIMARY_ONLY_APPS = {"auth", "sessions"}
+
+# Bật trong phạm vi một view được đánh dấu @read_replica
+_use_replica = ContextVar("use_replica", default=False)
+
+
+class PrimaryReplicaRouter:
+    """
+    Ghi luôn vào `default`; đọc từ `replica` khi đang chạy trong view @read_replica.
+    Nếu settings không khai báo replica thì mọi truy vấn đi về `default`.
+    """
+
+    def db_for_read(self, model, **hints):
+        # User và session luôn đọc từ primary: vừa đăng kí/đăng nhập thì replica có thể chưa có
+        if model._meta.app_label in PRIMARY_ONLY_APPS:
+            return DEFAULT_DB_ALIAS
+        if _use_replica.get() and REPLICA_DB_ALIAS in settings.DATABASES:
+            return REPLICA_DB_ALIAS
+        return DEFAULT_DB_ALIAS
+
+    def db_for_write(self, model, **hints):
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # replica là bản sao của default nên quan hệ giữa hai bên luôn hợp lệ
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        return db == DEFAULT_DB_ALIAS
+
+
+def pin_to_primary(request):
+    """Sau khi ghi (mượn/trả sách), đọc từ primary một lúc để thấy ngay dữ liệu mới"""
+    request.session[PIN_SESSION_KEY] = time.time() + getattr(settings, "REPLICA_PIN_SECONDS", 10)
+
+
+def is_pinned_to_primary(request):
+    return request.session.get(PIN_SESSION_KEY, 0) > time.time()
+
+
+def read_replica(view_func):
+    """Cho view chỉ đọc (GET/HEAD) truy vấn replica, trừ khi người dùng đang bị ghim vào primary"""
+
+    @wraps(view_func)
+    def _wrapped_view(request, *args, **kwargs):
+        if request.method not in ("GET", "HEAD") or is_pinned_to_primary(request):
+            return view_func(request, *args, **kwargs)
+        token = _use_replica.set(True)
+        try:
+            return view_func(request, *args, **kwargs)
+        finally:
+            _use_replica.reset(token)
+
+    return _wrapped_view
@@ -0,0 +1,95 @@
+import mimetypes
+import os
+from functools import lru_cache
+
+from django.conf import settings
+from django.core.exceptions import SuspiciousFileOperation
+from django.contrib.staticfiles.storage import staticfiles_storage
+from django.http import FileResponse, Http404, HttpResponseNotAllowed, HttpResponseNotModified
+from django.utils._os import safe_join
+from django.utils.http import http_date
+from django.views.static import was_modified_since
+
+# Thứ tự ưu tiên: brotli nhỏ hơn gzip nên thử trước
+ENCODINGS = (("br", ".br"), ("gzip", ".gz"))
+COMPRESSED_CONTENT_TYPES = {"br": "application/x-brotli", "gzip": "application/gzip"}
+
+IMMUTABLE_CACHE_CONTROL = "public, max-age=31536000, immutable"
+DEFAULT_CACHE_CONTROL = "public, max-age=60"
+
+
+@lru_cache(maxsize=1)
+def _hashed_names():
+    """Tên file đã gắn hash trong staticfiles.json (không bao giờ đổi nội dung)"""
+    return frozenset(getattr(staticfiles_storage, "hashed_files", {}).values())
+
+
+def _accepted_encodings(request):
+    accept = request.META.get("HTTP_ACCEPT_ENCODING", "")
+    accepted = set()
+    for part in accept.split(","):
+        coding, _, params = part.partition(";")
+        params = params.replace(" ", "")
+        try:
+            quality = float(params[2:]) if params.startswith("q=") else 1.0
+        except ValueError:
+            quality = 0.0
+        if quality > 0:
+            accepted.add(coding.strip().lower())
+    return accepted
+
+
+def serve_static(request, path):
+    """
+    Phục vụ file trong STATIC_ROOT sau khi collectstatic:
+    chọn bản .br/.gz nếu trình duyệt hỗ trợ, file có hash được cache vĩnh viễn.
+    """
+    if request.method not in ("GET", "HEAD"):
+        return HttpResponseNotAllowed(["GET", "HEAD"])
+
+    path = path.lstrip("/")
+    try:
+        fullpath = safe_join(settings.STATIC_ROOT, path)
+    except SuspiciousFileOperation:
+        raise Http404("File không tồn tại")
+    if not os.path.isfile(fullpath):
+        raise Http404("File không tồn tại")
+
+    content_type, file_encoding = mimetypes.guess_type(fullpath)
+    content_encoding = None
+    served_path = fullpath
+    if file_encoding:
+        # Gọi thẳng bản .gz/.br: trả đúng kiểu file nén, không gắn Content-Encoding
+        content_type = COMPRESSED_CONTENT_TYPES.get(file_encoding, "application/octet-stream")
+    else:
+        accepted = _accepted_encodings(request)
+        for encoding, suffix in ENCODINGS:
+            if encoding in accepted and os.path.isfile(fullpath + suffix):
+                content_encoding = encoding
+                served_path = fullpath + suffix
+                break
+
+    immutable = path in _hashed_names()
+    stat = os.stat(served_path)
+    cache_headers = {
+        "Cache-Control": IMMUTABLE_CACHE_CONTROL if immutable else DEFAULT_CACHE_CONTROL,
+        "Vary": "Accept-Encoding",
+    }
+    if not immutable and not was_modified_since(
+        request.META.get("HTTP_IF_MODIFIED_SINCE"), stat.st_mtime
+    ):
+        return HttpResponseNotModified(headers=cache_headers)
+
+    response = FileResponse(
+        open(served_path, "rb"),
+        content_type=content_type or "application/octet-stream",
+        headers=cache_headers,
+    )
+    # FileResponse tự thêm Content-Disposition theo tên file, file static không cần header này
+    if response.has_header("Content-Disposition"):
+        del response["Content-Disposition"]
+    response["Content-Length"] = stat.st_size
+    response["Last-Modified"] = http_date(stat.st_mtime)
+    if content_encoding:
+        response["Content-Encoding"] = content_encoding
+    return response
@@ -0,0 +1,193 @@
+import gzip
+import hashlib
+import io
+import os
+import posixpath
+import re
+from pathlib import Path
+
+from django.conf import settings
+from django.contrib.staticfiles.storage import ManifestStaticFilesStorage
+from django.core.files.base import ContentFile
+from django.core.files.storage import FileSystemStorage
+from django.template.utils import get_app_template_dirs
+
+try:
+    import brotli
+except ImportError:  # brotli là tuỳ chọn, thiếu thì chỉ tạo bản .gz
+    brotli = None
+
+try:
+    from PIL import Image, UnidentifiedImageError
+except ImportError:
+    Image = None
+
+
+STATIC_TAG_RE = re.compile(r"""{%\s*static\s+['"]([^'"]+)['"]""")
+CSS_URL_RE = re.compile(r"""url\(\s*['"]?([^'")\s]+)""")
+
+COMPRESSIBLE_EXTENSIONS = (".css", ".js", ".svg", ".eot", ".ttf", ".otf", ".json", ".txt")
+OPTIMIZABLE_IMAGE_EXTENSIONS = (".jpg", ".jpeg", ".png")
+
+# Bản nén phải nhỏ hơn ít nhất 5% thì mới đáng giữ lại
+MIN_COMPRESSION_RATIO = 0.95
+
+
+def _template_static_references():
+    """Các file static được template gọi qua {% static %}"""
+    template_dirs = list(get_app_template_dirs("templates"))
+    for engine in settings.TEMPLATES:
+        template_dirs.extend(Path(d) for d in engine.get("DIRS", []))
+
+    referenced = set()
+    for template_dir in template_dirs:
+        for path in template_dir.rglob("*.html"):
+            referenced.update(STATIC_TAG_RE.findall(path.read_text(encoding="utf-8")))
+    return referenced
+
+
+def _css_references(name, content):
+    """Các file mà một file CSS tham chiếu qua url(), đã chuẩn hoá đường dẫn"""
+    referenced = set()
+    for url in CSS_URL_RE.findall(content):
+        if re.match(r"^[a-z]+:", url) or url.startswith(("/", "#")):
+            continue
+        url = url.split("#", 1)[0].split("?", 1)[0]
+        if url:
+            referenced.add(posixpath.normpath(posixpath.join(posixpath.dirname(name), url)))
+    return referenced
+
+
+class CompressedManifestStaticFilesStorage(ManifestStaticFilesStorage):
+    """
+    Manifest storage có thêm các bước khi collectstatic:
+    bỏ font/ảnh không được dùng, tối ưu ảnh, rồi tạo sẵn bản .gz/.br
+    để static_views.serve_static trả về kèm Content-Encoding.
+    """
+
+    # Template gọi file static không tồn tại thì trả về tên gốc thay vì lỗi 500
+    manifest_strict = False
+
+    def url_converter(self, name, hashed_files, template=None):
+        converter = super().url_converter(name, hashed_files, template)
+
+        def tolerant_converter(matchobj):
+            # CSS của theme có tham chiếu tới file không đi kèm (vd. owl.video.play.png),
+            # giữ nguyên URL đó thay vì làm hỏng cả lần collectstatic
+            try:
+                return converter(matchobj)
+            except ValueError:
+                return matchobj.group("matched")
+
+        return tolerant_converter
+
+    def post_process(self, paths, dry_run=False, **options):
+        if dry_run:
+            return
+
+        paths = self._prune_unreferenced(paths)
+        self._optimize_images(paths)
+
+        yield from super().post_process(paths, dry_run=dry_run, **options)
+
+        names = set(paths) | set(self.hashed_files.values())
+        for name in sorted(names):
+            self._write_compressed_variants(name)
+
+    def _prune_unreferenced(self, paths):
+        prune_dirs = tuple(
+            d.rstrip("/") + "/" for d in getattr(settings, "STATICFILES_PRUNE_DIRS", [])
+        )
+        if not prune_dirs:
+            return paths
+
+        referenced = _template_static_references()
+        for name, (storage, path) in paths.items():
+            if name.endswith(".css"):
+                with storage.open(path) as css_file:
+                    content = css_file.read().decode("utf-8", errors="ignore")
+                referenced |= _css_references(name, content)
+
+        kept = {}
+        for name, value in paths.items():
+            if name.startswith(prune_dirs) and name not in referenced:
+                if self.exists(name):
+                    self.delete(name)
+                continue
+            kept[name] = value
+        return kept
+
+    def _optimize_images(self, paths):
+        if Image is None:
+            return
+
+        for name, (storage, path) in list(paths.items()):
+            if not name.lower().endswith(OPTIMIZABLE_IMAGE_EXTENSIONS):
+                continue
+            with storage.open(path) as image_file:
+                original = image_file.read()
+
+            try:
+                with Image.open(io.BytesIO(original)) as image:
+                    buffer = io.BytesIO()
+                    if image.format == "JPEG":
+                        image.save(buffer, "JPEG", quality=85, optimize=True, progressive=True)
+                    elif image.format == "PNG":
+                        image.save(buffer, "PNG", optimize=True)
+                    else:
+                        continue
+            except (UnidentifiedImageError, OSError):
+                # Ảnh hỏng hoặc sai đuôi: giữ nguyên file gốc, không làm hỏng collectstatic
+                continue
+
+            optimized = buffer.getvalue()
+            if len(optimized) >= len(original):
+                continue
+            if self.exists(name):
+                self.delete(name)
+            self._save(name, ContentFile(optimized))
+            # Hash phải tính trên nội dung đã tối ưu
+            paths[name] = (self, name)
+
+    def _write_compressed_variants(self, name):
+        if not name.lower().endswith(COMPRESSIBLE_EXTENSIONS) or not self.exists(name):
+            return
+
+        with self.open(name) as source:
+            content = source.read()
+
+        variants = [(".gz", gzip.compress(content, compresslevel=9, mtime=0))]
+        if brotli is not None:
+            variants.append((".br", brotli.compress(content)))
+
+        for suffix, compressed in variants:
+            compressed_name = name + suffix
+            if self.exists(compressed_name):
+                self.delete(compressed_name)
+            if len(compressed) < len(content) * MIN_COMPRESSION_RATIO:
+                self._save(compressed_name, ContentFile(compressed))
+
+
+class ContentAddressedStorage(FileSystemStorage):
+    """
+    Đặt tên file upload theo SHA-256 của nội dung: cùng một ảnh bìa chỉ lưu một lần
+    dù nhiều Book dùng chung. File không còn Book nào tham chiếu sẽ được
+    lệnh `python manage.py gc_media` dọn sau, không xoá trong request.
+    """
+
+    def _save(self, name, content):
+        digest = hashlib.sha256()
+        for chunk in content.chunks():
+            digest.update(chunk)
+        content.seek(0)
+
+        directory, filename = posixpath.split(name.replace("\\", "/"))
+        extension = posixpath.splitext(filename)[1].lower()
+        name = posixpath.join(directory, digest.hexdigest() + extension)
+
+        # Đã có file cùng nội dung thì dùng lại, không ghi thêm. Cập nhật mtime để
+        # gc_media (--min-age) không xoá file này trước khi Book kịp lưu
+        if self.exists(name):
+            os.utime(self.path(name))
+            return name
+        return super()._save(name, content)
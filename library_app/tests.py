@@ -1,3 +1,426 @@
-from django.test import TestCase
+import gzip
+import io
+import os
+import shutil
+import sqlite3
+import tempfile
+from pathlib import Path
+from unittest import mock
 
-# Create your tests here.
+from django.core.cache import caches
+from django.core.files.base import ContentFile
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.contrib.auth.models import User
+from django.contrib.sessions.backends.db import SessionStore
+from django.core.management import call_command
+from django.urls import reverse
+from django.db import connection, connections
+from django.test import (
+    Client,
+    RequestFactory,
+    SimpleTestCase,
+    TestCase,
+    TransactionTestCase,
+    override_settings,
+)
+from django.test.utils import CaptureQueriesContext
+
+from . import static_views
+from .static_views import serve_static
+from .models import Book, Category
+from .routers import PIN_SESSION_KEY, PrimaryReplicaRouter, pin_to_primary, read_replica
+from .backends import _user_cache
+from .storage import CompressedManifestStaticFilesStorage, ContentAddressedStorage, _css_references
+
+# Test render template mà không cần chạy collectstatic trước
+PLAIN_STATIC_STORAGES = {
+    "default": {"BACKEND": "library_app.storage.ContentAddressedStorage"},
+    "staticfiles": {"BACKEND": "django.contrib.staticfiles.storage.StaticFilesStorage"},
+}
+
+
+class StaticServingTests(SimpleTestCase):
+    def setUp(self):
+        self.static_root = Path(tempfile.mkdtemp())
+        self.addCleanup(shutil.rmtree, self.static_root)
+        css = b"body { color: red; }" * 50
+        (self.static_root / "site.abc123def456.css").write_bytes(css)
+        (self.static_root / "site.abc123def456.css.gz").write_bytes(gzip.compress(css))
+        (self.static_root / "site.css").write_bytes(css)
+        self.factory = RequestFactory()
+        static_views._hashed_names.cache_clear()
+        self.addCleanup(static_views._hashed_names.cache_clear)
+
+    def get(self, path, **headers):
+        with override_settings(STATIC_ROOT=self.static_root):
+            return serve_static(self.factory.get("/static/" + path, headers=headers), path)
+
+    def test_gzip_variant_when_accepted(self):
+        response = self.get("site.abc123def456.css", accept_encoding="gzip, deflate")
+        self.assertEqual(response["Content-Encoding"], "gzip")
+        self.assertEqual(response["Content-Type"], "text/css")
+        self.assertEqual(response["Vary"], "Accept-Encoding")
+        self.assertFalse(response.has_header("Content-Disposition"))
+
+    def test_identity_when_encoding_refused(self):
+        response = self.get("site.css", accept_encoding="gzip;q=0")
+        self.assertFalse(response.has_header("Content-Encoding"))
+
+    def test_direct_compressed_file_is_not_labelled_as_css(self):
+        response = self.get("site.abc123def456.css.gz", accept_encoding="gzip")
+        self.assertEqual(response["Content-Type"], "application/gzip")
+        self.assertFalse(response.has_header("Content-Encoding"))
+
+    def test_not_modified_keeps_cache_headers(self):
+        response = self.get("site.css", if_modified_since="Fri, 01 Jan 2100 00:00:00 GMT")
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response["Cache-Control"], static_views.DEFAULT_CACHE_CONTROL)
+        self.assertEqual(response["Vary"], "Accept-Encoding")
+
+    def test_hashed_name_is_immutable(self):
+        hashed = frozenset({"site.abc123def456.css"})
+        with mock.patch.object(static_views, "_hashed_names", return_value=hashed):
+            self.assertIn("immutable", self.get("site.abc123def456.css")["Cache-Control"])
+            self.assertNotIn("immutable", self.get("site.css")["Cache-Control"])
+
+
+class ImageOptimizationTests(SimpleTestCase):
+    def test_corrupt_image_keeps_original_bytes(self):
+        static_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, static_root)
+        storage = CompressedManifestStaticFilesStorage(location=static_root)
+        storage._save("images/broken.png", ContentFile(b"not really a png"))
+        paths = {"images/broken.png": (storage, "images/broken.png")}
+
+        storage._optimize_images(paths)
+
+        with storage.open("images/broken.png") as image_file:
+            self.assertEqual(image_file.read(), b"not really a png")
+
+
+class CollectstaticPruneTests(SimpleTestCase):
+    def setUp(self):
+        base = Path(tempfile.mkdtemp())
+        self.addCleanup(shutil.rmtree, base)
+        source, templates, self.static_root = base / "static", base / "templates", base / "collected"
+        for name, content in {
+            "css/site.css": b"@font-face { src: url('../fonts/used.woff2?v=1'); }",
+            "fonts/used.woff2": b"used font",
+            "fonts/unused.woff": b"unused font",
+            "images/used.png": b"used image",
+            "images/unused.png": b"unused image",
+        }.items():
+            (source / name).parent.mkdir(parents=True, exist_ok=True)
+            (source / name).write_bytes(content)
+        templates.mkdir()
+        (templates / "page.html").write_text("{% load static %}<img src=\"{% static 'images/used.png' %}\">")
+
+        override = override_settings(
+            STATIC_ROOT=self.static_root,
+            STATICFILES_DIRS=[source],
+            STATICFILES_FINDERS=["django.contrib.staticfiles.finders.FileSystemFinder"],
+            STATICFILES_PRUNE_DIRS=["fonts", "images"],
+            TEMPLATES=[{"BACKEND": "django.template.backends.django.DjangoTemplates", "DIRS": [templates]}],
+        )
+        override.enable()
+        self.addCleanup(override.disable)
+
+    def collected(self, directory):
+        return {name.split(".")[0] for name in os.listdir(self.static_root / directory)}
+
+    def test_unreferenced_files_are_pruned(self):
+        call_command("collectstatic", interactive=False, verbosity=0)
+
+        self.assertEqual(self.collected("fonts"), {"used"})
+        self.assertEqual(self.collected("images"), {"used"})
+
+
+class CssReferenceTests(SimpleTestCase):
+    def test_resolves_relative_urls_and_skips_external(self):
+        content = (
+            "src: url('../fonts/a.woff2?v=4.7.0') format('woff2'),"
+            " url(../fonts/a.svg#regular); background: url(data:image/png;base64,xx);"
+            " @import url(https://fonts.googleapis.com/css);"
+        )
+        self.assertEqual(
+            _css_references("css/site.css", content),
+            {"fonts/a.woff2", "fonts/a.svg"},
+        )
+
+
+class ContentAddressedStorageTests(SimpleTestCase):
+    def setUp(self):
+        self.media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.media_root)
+        self.storage = ContentAddressedStorage(location=self.media_root)
+
+    def test_identical_content_is_stored_once(self):
+        first = self.storage.save("book_images/s-l225.webp", ContentFile(b"cover"))
+        second = self.storage.save("book_images/other.WEBP", ContentFile(b"cover"))
+        self.assertEqual(first, second)
+        self.assertTrue(first.startswith("book_images/") and first.endswith(".webp"))
+        self.assertEqual(len(os.listdir(os.path.join(self.media_root, "book_images"))), 1)
+
+    def test_different_content_gets_different_names(self):
+        first = self.storage.save("book_images/a.jpg", ContentFile(b"one"))
+        second = self.storage.save("book_images/a.jpg", ContentFile(b"two"))
+        self.assertNotEqual(first, second)
+
+
+class GcMediaCommandTests(TestCase):
+    def setUp(self):
+        self.media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.media_root)
+        override = override_settings(MEDIA_ROOT=self.media_root)
+        override.enable()
+        self.addCleanup(override.disable)
+
+    def create_book(self, title, content):
+        image = SimpleUploadedFile("cover.jpg", content)
+        return Book.objects.create(title=title, author="A", quantity=1, available=1, image=image)
+
+    def test_removes_only_unreferenced_files(self):
+        kept = self.create_book("Kept", b"shared")
+        shared = self.create_book("Shared", b"shared")
+        orphan = self.create_book("Orphan", b"orphan")
+        self.assertEqual(kept.image.name, shared.image.name)
+        orphan.delete()
+        shared.delete()
+
+        call_command("gc_media", "--min-age=0", "--batch-size=1", stdout=io.StringIO())
+
+        remaining = os.listdir(os.path.join(self.media_root, "book_images"))
+        self.assertEqual(remaining, [os.path.basename(kept.image.name)])
+
+    def test_reuploaded_old_orphan_is_kept(self):
+        orphan = self.create_book("Orphan", b"orphan")
+        path = orphan.image.path
+        orphan.delete()
+        os.utime(path, (0, 0))
+
+        # Upload lại đúng ảnh cũ: file dùng lại phải được coi là mới
+        storage = ContentAddressedStorage()
+        self.assertEqual(storage.save("book_images/again.jpg", ContentFile(b"orphan")), orphan.image.name)
+        call_command("gc_media", stdout=io.StringIO())
+
+        self.assertTrue(os.path.exists(path))
+
+    def test_edit_and_delete_leave_files_for_gc(self):
+        staff = User.objects.create_user("staff", email="staff@example.com", password="pw", is_staff=True)
+        self.client.force_login(staff)
+        book = self.create_book("B", b"old cover")
+        old_path = book.image.path
+
+        self.client.post(reverse("library:edit_book", args=[book.id]), {
+            "title": "B",
+            "quantity": 1,
+            "image": SimpleUploadedFile("new.jpg", b"new cover"),
+        })
+        book.refresh_from_db()
+        new_path = book.image.path
+        self.assertNotEqual(old_path, new_path)
+        self.assertTrue(os.path.exists(old_path))
+
+        self.client.post(reverse("library:delete_book", args=[book.id]))
+        self.assertFalse(Book.objects.filter(id=book.id).exists())
+        self.assertTrue(os.path.exists(new_path))
+
+        call_command("gc_media", "--min-age=0", stdout=io.StringIO())
+        self.assertFalse(os.path.exists(old_path))
+        self.assertFalse(os.path.exists(new_path))
+
+    def test_recent_files_are_kept(self):
+        self.create_book("Orphan", b"orphan").delete()
+        call_command("gc_media", stdout=io.StringIO())
+        self.assertEqual(len(os.listdir(os.path.join(self.media_root, "book_images"))), 1)
+
+
+class ReadReplicaRoutingTests(SimpleTestCase):
+    def setUp(self):
+        self.factory = RequestFactory()
+        self.router = PrimaryReplicaRouter()
+
+        @read_replica
+        def view(request):
+            return self.router.db_for_read(Book)
+
+        self.view = view
+
+    def make_request(self, method="get"):
+        request = getattr(self.factory, method)("/")
+        request.session = SessionStore()
+        return request
+
+    def test_read_only_view_uses_replica(self):
+        self.assertEqual(self.view(self.make_request()), "replica")
+        self.assertEqual(self.router.db_for_read(Book), "default")
+
+    def test_post_and_pinned_user_use_primary(self):
+        self.assertEqual(self.view(self.make_request("post")), "default")
+        request = self.make_request()
+        pin_to_primary(request)
+        self.assertEqual(self.view(request), "default")
+
+    def test_writes_always_go_to_primary(self):
+        self.assertEqual(self.router.db_for_write(Book), "default")
+        self.assertFalse(self.router.allow_migrate("replica", "library_app"))
+
+
+@override_settings(STORAGES=PLAIN_STATIC_STORAGES)
+class BorrowPinsToPrimaryTests(TestCase):
+    # Không khai báo "replica" trong databases: truy vấn nào lọt sang replica sẽ làm test lỗi
+    def test_borrow_pins_user_to_primary(self):
+        user = User.objects.create_user("reader", email="reader@example.com", password="pw")
+        book = Book.objects.create(title="B", author="A", quantity=1, available=1)
+        self.client.force_login(user)
+
+        self.client.post(reverse("library:borrow_book", args=[book.id]))
+
+        self.assertIn(PIN_SESSION_KEY, self.client.session)
+        response = self.client.get(reverse("library:home"))
+        self.assertEqual(len(response.context["borrow_records"]), 1)
+
+    def test_staff_book_writes_pin_to_primary(self):
+        staff = User.objects.create_user("staff", email="staff@example.com", password="pw", is_staff=True)
+        category = Category.objects.create(name="C")
+        book = Book.objects.create(title="B", author="A", quantity=1, available=1)
+        self.client.force_login(staff)
+
+        for url, data in [
+            (reverse("library:add_book"), {"title": "New", "author": "A", "category": category.id, "quantity": 1}),
+            (reverse("library:edit_book", args=[book.id]), {"title": "Edited", "quantity": 1}),
+            (reverse("library:delete_book", args=[book.id]), {}),
+        ]:
+            session = self.client.session
+            session.pop(PIN_SESSION_KEY, None)
+            session.save()
+            self.client.post(url, data)
+            self.assertIn(PIN_SESSION_KEY, self.client.session, url)
+
+
+@override_settings(STORAGES=PLAIN_STATIC_STORAGES)
+class StaleReplicaTests(TransactionTestCase):
+    databases = {"default", "replica"}
+
+    def setUp(self):
+        # Replica là bản chụp của DB test trước khi có dữ liệu mới, tức là đang trễ
+        handle, replica_path = tempfile.mkstemp(suffix=".sqlite3")
+        os.close(handle)
+        self.addCleanup(os.remove, replica_path)
+        connections["default"].ensure_connection()
+        target = sqlite3.connect(replica_path)
+        connections["default"].connection.backup(target)
+        target.close()
+
+        replica = connections["replica"]
+        original_settings = replica.settings_dict
+        replica.close()
+        replica.settings_dict = {**original_settings, "NAME": replica_path}
+
+        def restore():
+            replica.close()
+            replica.settings_dict = original_settings
+
+        self.addCleanup(restore)
+
+    def test_new_user_is_logged_in_on_replica_page(self):
+        user = User.objects.create_user("newbie", email="newbie@example.com", password="pw")
+        Book.objects.create(title="Chưa sang replica", author="A", quantity=1, available=1)
+        self.client.force_login(user)
+
+        response = self.client.get(reverse("library:home"))
+
+        # Sách đọc từ replica (chưa có), còn User/session vẫn lấy từ primary
+        self.assertEqual(len(response.context["books"]), 0)
+        self.assertEqual(response.context["user"], user)
+
+
+# Cache "users" riêng từng process, "user_versions" đóng vai cache dùng chung (Redis)
+SHARED_VERSION_CACHES = {
+    "default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache", "LOCATION": "test-default"},
+    "users": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache", "LOCATION": "test-users"},
+    "user_versions": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache", "LOCATION": "test-versions"},
+}
+
+
+@override_settings(
+    STORAGES=PLAIN_STATIC_STORAGES,
+    CACHES=SHARED_VERSION_CACHES,
+    USER_CACHE_VERSION_ALIAS="user_versions",
+)
+class CachedUserTests(TestCase):
+    def setUp(self):
+        _user_cache().clear()
+        caches["user_versions"].clear()
+        self.user = User.objects.create_user("reader", email="reader@example.com", password="Old-pass-123")
+        self.client.force_login(self.user)
+
+    def auth_user_queries(self):
+        with CaptureQueriesContext(connection) as queries:
+            self.client.get(reverse("library:profile"))
+        return [q for q in queries if "auth_user" in q["sql"]]
+
+    def test_authenticated_request_skips_user_query(self):
+        self.client.get(reverse("library:profile"))
+        self.assertFalse(self.auth_user_queries())
+
+    def test_saving_user_invalidates_cache(self):
+        self.client.get(reverse("library:profile"))
+        self.user.first_name = "New"
+        self.user.save()
+        self.assertTrue(self.auth_user_queries())
+
+    @override_settings(USER_CACHE_VERSION_ALIAS=None)
+    def test_no_shared_cache_means_no_user_cache(self):
+        self.client.get(reverse("library:profile"))
+        self.assertTrue(self.auth_user_queries())
+
+    def test_cached_user_is_loaded_from_primary(self):
+        # Giả lập router đưa User sang replica; test không mở replica nên truy vấn lọt sang đó sẽ lỗi
+        def db_for_read(model, **hints):
+            return "replica" if model is User else "default"
+
+        with mock.patch("django.db.router.db_for_read", side_effect=db_for_read):
+            response = self.client.get(reverse("library:profile"))
+        self.assertEqual(response.context["user"], self.user)
+
+    def test_password_change_is_not_served_from_stale_cache(self):
+        other = Client()
+        other.force_login(self.user)
+        self.client.get(reverse("library:profile"))
+        other.get(reverse("library:profile"))
+
+        # Signal chỉ đổi phiên bản, bản User cũ vẫn nằm trong cache như ở một worker khác
+        response = self.client.post(reverse("library:profile_change_password"), {
+            "old_password": "Old-pass-123",
+            "new_password1": "New-pass-456",
+            "new_password2": "New-pass-456",
+        })
+        self.assertRedirects(response, reverse("library:profile"))
+
+        self.assertEqual(self.client.get(reverse("library:profile")).status_code, 200)
+        self.assertRedirects(
+            other.get(reverse("library:profile")),
+            "%s?next=%s" % (reverse("library:login"), reverse("library:profile")),
+        )
+
+
+@override_settings(STORAGES=PLAIN_STATIC_STORAGES)
+class RegisterTests(TestCase):
+    def register(self, username, email):
+        return self.client.post(reverse("library:register"), {
+            "last_name": "L",
+            "first_name": "F",
+            "username": username,
+            "email": email,
+            "password1": "Secret-pass-1",
+            "password2": "Secret-pass-1",
+        })
+
+    @override_settings(PASSWORD_HASHERS=["django.contrib.auth.hashers.MD5PasswordHasher"])
+    def test_duplicate_username_or_email_is_rejected(self):
+        self.assertRedirects(self.register("reader", "reader@example.com"), reverse("library:login"))
+        self.assertRedirects(self.register("reader", "other@example.com"), reverse("library:register"))
+        self.assertRedirects(self.register("other", "reader@example.com"), reverse("library:register"))
+        self.assertEqual(User.objects.count(), 1)
+        self.assertTrue(User.objects.get().password.startswith("md5$"))
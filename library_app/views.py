@@ -4,6 +4,8 @@ from django.http import HttpResponseForbidden
 from datetime import timedelta
 from .models import Book, Reader, BorrowRecord, Category
 from .form import BookForm
+from .routers import pin_to_primary, read_replica
+from django.db import IntegrityError, transaction
 from django.db.models import Q
 
 from django.contrib import messages
@@ -40,6 +42,7 @@ def borrow_book(request, book_id):
     BorrowRecord.objects.create(reader=reader, book=book, due_date=due_date)
     book.available = max(0, book.available - 1)
     book.save()
+    pin_to_primary(request)
 
     return redirect("library:home")
 
@@ -63,10 +66,12 @@ def return_book(request, record_id):
         book.available = min(book.quantity, book.available + 1)
         book.save()
         record.save()
+        pin_to_primary(request)
 
     return redirect("library:home")
 
 
+@read_replica
 def home(request):
     query = request.GET.get('q', '').strip()  # Lấy nội dung người dùng nhập
     category_filter = request.GET.get('category', '')  # Nếu có chọn thể loại
@@ -120,6 +125,7 @@ def add_book(request):
             # Khi thêm sách mới, gán available = quantity
             book.available = book.quantity
             book.save()
+            pin_to_primary(request)
             messages.success(request, "Thêm sách thành công")
             return redirect('library:home')
     else:
@@ -151,12 +157,11 @@ def edit_book(request, book_id):
         
         # Xử lý ảnh mới nếu có
         if "image" in request.FILES:
-            # Xóa ảnh cũ nếu có
-            if book.image:
-                book.image.delete(save=False)
+            # Ảnh cũ có thể đang được sách khác dùng chung, để gc_media dọn sau
             book.image = request.FILES["image"]
             
         book.save()
+        pin_to_primary(request)
         return redirect("library:home")
         
     else:
@@ -181,17 +186,16 @@ def delete_book(request, book_id):
             "message": "Không thể xóa sách này vì đang có người mượn!"
         })
 
-    # Xóa ảnh cũ nếu có
-    if book.image:
-        book.image.delete(save=False)
-    
+    # Không xóa ảnh ở đây: ảnh có thể dùng chung, gc_media sẽ dọn ảnh không còn sách nào dùng
     # Xóa sách
     book.delete()
+    pin_to_primary(request)
     return redirect("library:home")
 
 
 @login_required
 @user_passes_test(is_staff_user) # Chỉ staff mới xem được trang này
+@read_replica
 def statistics_view(request):
  
     # Đếm tổng số sách (dùng model Book)
@@ -224,6 +228,7 @@ def statistics_view(request):
 
 @login_required
 @user_passes_test(is_staff_user)
+@read_replica
 def check_inventory(request):
     low_stock_books = Book.objects.filter(available__lt=5)
     return render(request, "inventory.html", {
@@ -232,6 +237,7 @@ def check_inventory(request):
 
 @login_required
 @user_passes_test(is_staff_user)
+@read_replica
 def check_overdue(request):
     overdue_records = BorrowRecord.objects.filter(
         return_date__isnull=True,
@@ -291,16 +297,22 @@ def register_view(request):
                 'username': username,
                 'email': email
             })
-        if User.objects.filter(username=username).exists() or User.objects.filter(email=email).exists():
+        # Kiểm tra trùng bằng một truy vấn; hai người đăng kí cùng lúc thì ràng buộc unique của DB chặn
+        if User.objects.filter(Q(username=username) | Q(email=email)).exists():
+            messages.error(request, 'Tên đăng nhập hoặc email đã tồn tại')
+            return redirect('library:register')
+        try:
+            with transaction.atomic():
+                User.objects.create_user(
+                    last_name=last_name,
+                    first_name=first_name,
+                    username=username,
+                    email=email,
+                    password=password1
+                )
+        except IntegrityError:
             messages.error(request, 'Tên đăng nhập hoặc email đã tồn tại')
             return redirect('library:register')
-        user = User.objects.create_user(
-            last_name=last_name,
-            first_name=first_name,
-            username=username,
-            email=email,
-            password=password1
-        )
         messages.success(request,'Đăng kí tài khoản thành công')
         return redirect('library:login')
     return render(request,'accounts/register.html')
@@ -10,6 +10,7 @@ For the full list of settings and their values, see
 https://docs.djangoproject.com/en/5.2/ref/settings/
 """
 
+import os
 from pathlib import Path
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
@@ -77,9 +78,64 @@ DATABASES = {
     'default': {
         'ENGINE': 'django.db.backends.sqlite3',
         'NAME': BASE_DIR / 'db.sqlite3',
-    }
+    },
+    # Bản sao chỉ đọc cho các view @read_replica (trang chủ, tồn kho, quá hạn, thống kê).
+    # Mặc định trỏ cùng file với default; thử replica riêng khi chạy local:
+    #   LIBRARY_REPLICA_DB=db_replica.sqlite3 python manage.py sync_replica
+    # Với MySQL chỉ cần đổi ENGINE/HOST sang máy replica.
+    'replica': {
+        'ENGINE': 'django.db.backends.sqlite3',
+        'NAME': os.environ.get('LIBRARY_REPLICA_DB', BASE_DIR / 'db.sqlite3'),
+        'TEST': {
+            'MIRROR': 'default',
+        },
+    },
+}
+
+DATABASE_ROUTERS = ['library_app.routers.PrimaryReplicaRouter']
+
+# Sau khi mượn/trả sách, người dùng đọc từ primary trong chừng này giây
+REPLICA_PIN_SECONDS = 10
+
+
+# Cache
+# https://docs.djangoproject.com/en/5.2/topics/cache/
+
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'library-default',
+    },
+    # Cache User theo từng process cho library_app.backends.CachedModelBackend
+    'users': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'library-users',
+    },
 }
 
+# Session phải nằm ở nơi mọi worker cùng thấy (đăng xuất, khoá ghim primary sau khi mượn/trả),
+# nên không dùng LocMemCache ở trên. Có Redis (LIBRARY_REDIS_URL, cần cài gói redis) thì
+# session đọc từ Redis và ghi xuống DB (cached_db); không có thì đọc thẳng bảng django_session.
+LIBRARY_REDIS_URL = os.environ.get('LIBRARY_REDIS_URL')
+if LIBRARY_REDIS_URL:
+    CACHES['sessions'] = {
+        'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+        'LOCATION': LIBRARY_REDIS_URL,
+    }
+    SESSION_CACHE_ALIAS = 'sessions'
+    SESSION_ENGINE = 'django.contrib.sessions.backends.cached_db'
+else:
+    SESSION_ENGINE = 'django.contrib.sessions.backends.db'
+
+AUTHENTICATION_BACKENDS = ['library_app.backends.CachedModelBackend']
+
+# Số giây một User được giữ trong cache của mỗi process
+USER_CACHE_TIMEOUT = 60
+
+# Phiên bản User phải nằm trong cache dùng chung để mọi worker thấy ngay khi User đổi
+# (mật khẩu, is_active, is_staff). Không có Redis thì CachedModelBackend không cache User.
+USER_CACHE_VERSION_ALIAS = 'sessions' if LIBRARY_REDIS_URL else None
+
 
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
@@ -100,6 +156,23 @@ AUTH_PASSWORD_VALIDATORS = [
 ]
 
 
+# Hasher đầu tiên dùng để băm mật khẩu mới, các hasher còn lại vẫn kiểm tra được mật khẩu cũ.
+# Đổi hasher mặc định: LIBRARY_PASSWORD_HASHER=django.contrib.auth.hashers.ScryptPasswordHasher
+# https://docs.djangoproject.com/en/5.2/topics/auth/passwords/
+
+PASSWORD_HASHERS = [
+    'django.contrib.auth.hashers.PBKDF2PasswordHasher',
+    'django.contrib.auth.hashers.PBKDF2SHA1PasswordHasher',
+    'django.contrib.auth.hashers.Argon2PasswordHasher',
+    'django.contrib.auth.hashers.BCryptSHA256PasswordHasher',
+    'django.contrib.auth.hashers.ScryptPasswordHasher',
+]
+
+_preferred_hasher = os.environ.get('LIBRARY_PASSWORD_HASHER')
+if _preferred_hasher:
+    PASSWORD_HASHERS = [_preferred_hasher] + [h for h in PASSWORD_HASHERS if h != _preferred_hasher]
+
+
 # Internationalization
 # https://docs.djangoproject.com/en/5.2/topics/i18n/
 
@@ -116,6 +189,22 @@ USE_TZ = True
 # https://docs.djangoproject.com/en/5.2/howto/static-files/
 
 STATIC_URL = 'static/'
+STATIC_ROOT = BASE_DIR / 'staticfiles'
+
+# collectstatic tạo tên file có hash (staticfiles.json) và bản nén sẵn .gz/.br
+STORAGES = {
+    # Ảnh upload đặt tên theo hash nội dung; file mồ côi dọn bằng `manage.py gc_media`
+    'default': {
+        'BACKEND': 'library_app.storage.ContentAddressedStorage',
+    },
+    'staticfiles': {
+        'BACKEND': 'library_app.storage.CompressedManifestStaticFilesStorage',
+    },
+}
+
+# Font/ảnh trong các thư mục này bị bỏ khi collectstatic nếu không có CSS/template nào dùng
+STATICFILES_PRUNE_DIRS = ['fonts', 'images']
+
 MEDIA_URL = '/media/'
 MEDIA_ROOT = BASE_DIR / 'media'
 
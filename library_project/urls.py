@@ -1,7 +1,8 @@
 from django.contrib import admin
-from django.urls import path, include
+from django.urls import path, re_path, include
 from django.conf import settings
 from django.conf.urls.static import static
+from library_app.static_views import serve_static
 
 urlpatterns = [
     path('admin/', admin.site.urls),
@@ -10,4 +11,9 @@ urlpatterns = [
 
 # Thêm cấu hình để phục vụ file media trong môi trường phát triển
 if settings.DEBUG:
-    urlpatterns += static(settings.MEDIA_URL, document_root=settings.MEDIA_ROOT)
\ No newline at end of file
+    urlpatterns += static(settings.MEDIA_URL, document_root=settings.MEDIA_ROOT)
+else:
+    # Phục vụ file đã collectstatic kèm Content-Encoding và Cache-Control: immutable
+    urlpatterns += [
+        re_path(r'^%s(?P<path>.*)$' % settings.STATIC_URL.lstrip('/'), serve_static),
+    ]